@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# Benchmark startup time of misgit, i.e. cold import plus execution time, by
+# running it as a new process a number of times. The time of starting a bare
+# python interpreter is subtracted, so what remains is the cost of misgit itself.
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+TOPDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+MISGIT = os.path.join(TOPDIR, "misgit")
+
+
+def time_run(argv, cwd=None):
+    """
+    Run `argv` and return its wall-clock time in milliseconds
+    """
+    started = time.perf_counter()
+    subprocess.run(argv, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - started) * 1000
+
+
+def print_importtime(argv, cwd=None, top=15):
+    """
+    Print the `top` slowest imports (cumulative) of running `argv` with python -X importtime
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime"] + argv[1:], cwd=cwd,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        encoding="utf8", universal_newlines=True)
+
+    # Lines are "import time: self [us] | cumulative | imported package"
+    imports = []
+    for line in process.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            imports.append((int(parts[1]), parts[2].rstrip()))
+
+    print(f"Slowest imports (cumulative):")
+    for usecs, name in sorted(imports, reverse=True)[:top]:
+        print(f"  {usecs / 1000:6.1f}ms {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark startup time (cold import plus execution) of misgit")
+    parser.add_argument(dest='args', metavar='ARG', nargs="*", default=["--prompt"],
+        help="Arguments to misgit. Default is --prompt")
+    parser.add_argument('-n', dest='runs', type=int, default=20,
+        help="Number of runs")
+    parser.add_argument('-C', dest='cwd', metavar='DIR', default=None,
+        help="Directory to run misgit in, e.g. a git repo. Default is current dir")
+    parser.add_argument('--max-ms', dest='max_ms', type=float, default=None,
+        help="Exit with status 1 if median time (minus python startup) exceeds this")
+    parser.add_argument('--importtime', action='store_true', default=False,
+        help="Also print the slowest imports")
+    opt = parser.parse_args()
+
+    # Compile bytecode first like an installed package has it, otherwise
+    # each run may spend more time compiling than running
+    subprocess.run([sys.executable, "-m", "compileall", "-q", os.path.join(TOPDIR, "multigit")])
+
+    argv = [sys.executable, MISGIT] + opt.args
+    # Runs of bare python and misgit are interleaved, so that both are
+    # equally affected by other load on the machine
+    baseline = []
+    times = []
+    for _ in range(opt.runs):
+        baseline.append(time_run([sys.executable, "-c", "pass"], cwd=opt.cwd))
+        times.append(time_run(argv, cwd=opt.cwd))
+
+    python_ms = statistics.median(baseline)
+    median_ms = statistics.median(times)
+    overhead_ms = median_ms - python_ms
+    print(f"misgit {' '.join(opt.args)}: runs={opt.runs}"
+          f" min={min(times):.1f}ms median={median_ms:.1f}ms max={max(times):.1f}ms")
+    print(f"python startup: median={python_ms:.1f}ms")
+    print(f"misgit overhead: median={overhead_ms:.1f}ms")
+
+    if opt.importtime:
+        print_importtime(argv, cwd=opt.cwd)
+
+    if opt.max_ms is not None and overhead_ms > opt.max_ms:
+        print(f"FAIL: overhead {overhead_ms:.1f}ms exceeds {opt.max_ms:.1f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+import os
+import time
+import atexit
+import threading
+import contextlib
+import subprocess
+import collections
+
+from multigit import misc
+
+
+# Max number of `git cat-file` processes kept running by the default pool
+POOL_SIZE = 32
+
+# Max number of requests written to a cat-file process before reading the
+# replies. Requests of this many lines must fit in the pipe buffer, otherwise
+# we can deadlock with cat-file blocking on writing replies we do not read yet
+BATCH_SIZE = 100
+
+
+class CatFile:
+    """
+    Long-lived `git cat-file --batch` process for reading objects of one repo.
+    This avoids spawning a new git process (that re-opens the object database)
+    for each commit or tag we want to inspect.
+    """
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self.lock = threading.Lock()
+        self.process = subprocess.Popen(
+            ["git", "-C", repo_path, "cat-file", "--batch"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        # Number of pool leases and whether pool has evicted us, see CatFilePool
+        self.users = 0
+        self.evicted = False
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def read(self, rev: str):
+        """
+        Read object given by `rev` which can be any revision expression that
+        git rev-parse understands, e.g. "HEAD" or "v1.0^{commit}"
+
+        :return: tuple (sha, type, data) or None if object does not exist
+        """
+        return self.read_many([rev])[0]
+
+    def read_many(self, revs):
+        """
+        Read objects given by `revs` (see read()). Requests are written in
+        batches before reading the replies, to avoid a round trip per object.
+
+        :return: list with a tuple (sha, type, data) or None for each rev
+        """
+        objs = []
+        with self.lock:
+            for i in range(0, len(revs), BATCH_SIZE):
+                batch = revs[i:i + BATCH_SIZE]
+                try:
+                    self.process.stdin.write(b"".join(rev.encode() + b"\n" for rev in batch))
+                    self.process.stdin.flush()
+                except (BrokenPipeError, ValueError):
+                    raise RuntimeError(f"git cat-file failed in {self.repo_path}")
+
+                for _ in batch:
+                    header = self.process.stdout.readline()
+                    if not header:
+                        raise RuntimeError(f"git cat-file failed in {self.repo_path}")
+
+                    # Header is "<sha> <type> <size>" or "<rev> missing"
+                    parts = header.split()
+                    if len(parts) != 3 or parts[-1] in (b"missing", b"ambiguous"):
+                        objs.append(None)
+                        continue
+
+                    sha, objtype, size = parts
+                    data = self.process.stdout.read(int(size))
+                    # Skip newline trailing the object data
+                    self.process.stdout.read(1)
+                    objs.append((sha.decode(), objtype.decode(), data))
+
+        return objs
+
+    def commit(self, rev="HEAD"):
+        """
+        Read and parse the commit that `rev` points to (peeling tags)
+
+        :return: dict with 'sha', 'parents', 'committer_time', 'committer_tz'
+                 and 'subject', or None if there is no such commit
+        """
+        return self.commits([rev])[0]
+
+    def commits(self, revs):
+        """
+        Read and parse the commits that `revs` point to, see commit()
+        """
+        objs = self.read_many([f"{rev}^{{commit}}" for rev in revs])
+        return [parse_commit(obj[0], obj[2]) if obj else None for obj in objs]
+
+    def close(self):
+        with self.lock:
+            if self.process.stdin:
+                self.process.stdin.close()
+            self.process.wait()
+
+
+class CatFilePool:
+    """
+    Pool of CatFile processes, one per repo. When more than `size` processes
+    are running, the least recently used one is closed (when no longer leased).
+    """
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self.lock = threading.Lock()
+        self.workers = collections.OrderedDict()
+
+    @contextlib.contextmanager
+    def lease(self, repo_path: str):
+        """
+        Get the CatFile of repo at `repo_path` for use in a with statement.
+        It is not closed by eviction from the pool until the with block ends.
+        """
+        key = os.path.realpath(repo_path)
+        evicted = []
+        with self.lock:
+            worker = self.workers.pop(key, None)
+            if worker is None or not worker.is_alive():
+                worker = CatFile(repo_path)
+            self.workers[key] = worker
+            worker.users += 1
+            while len(self.workers) > self.size:
+                old = self.workers.popitem(last=False)[1]
+                if old.users:
+                    old.evicted = True
+                else:
+                    evicted.append(old)
+
+        for old in evicted:
+            old.close()
+
+        try:
+            yield worker
+        finally:
+            with self.lock:
+                worker.users -= 1
+                close = worker.evicted and not worker.users
+            if close:
+                worker.close()
+
+    def evict(self, repo_path: str):
+        """
+        Close the CatFile of repo at `repo_path` (when no longer leased), so
+        that the next lease starts a new process
+        """
+        with self.lock:
+            worker = self.workers.pop(os.path.realpath(repo_path), None)
+            if worker is None:
+                return
+            worker.evicted = True
+            if worker.users:
+                return
+
+        worker.close()
+
+    def close(self):
+        with self.lock:
+            workers = list(self.workers.values())
+            self.workers.clear()
+
+        for worker in workers:
+            worker.close()
+
+
+pool = CatFilePool()
+atexit.register(pool.close)
+
+# Cache of last_tag(): repo path -> (refs_mtimes(), tag name)
+last_tags = {}
+
+
+def parse_commit(sha: str, data: bytes):
+    """
+    Parse commit object `data`, see CatFile.commit()
+    """
+    headers, _, message = data.decode("utf8", errors="replace").partition("\n\n")
+    commit = {'sha': sha, 'parents': [], 'committer_time': 0, 'committer_tz': "+0000"}
+    for line in headers.splitlines():
+        if line.startswith("parent "):
+            commit['parents'].append(line[len("parent "):])
+        elif line.startswith("committer "):
+            # "committer Joe <joe@example.com> 1670233069 +0100"
+            ts, tz = line.rsplit(" ", maxsplit=2)[1:]
+            commit['committer_time'] = int(ts)
+            commit['committer_tz'] = tz
+
+    # Like %s of git log: the first paragraph joined into one line
+    subject = message.strip().split("\n\n", maxsplit=1)[0]
+    commit['subject'] = " ".join(line.strip() for line in subject.splitlines())
+
+    return commit
+
+
+def refs_mtimes(commondir: str):
+    """
+    :return: mtimes of packed-refs and refs/tags/ directories which change
+             when tags are created, deleted or updated
+    """
+    paths = [f"{commondir}/packed-refs"] + [root for root, _, _ in os.walk(f"{commondir}/refs/tags")]
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            mtimes.append(0)
+    return tuple(mtimes)
+
+
+def head_commit(repo_path: str):
+    """
+    :return: commit HEAD points to (see CatFile.commit()) or None if repo has no commits
+    """
+    with pool.lease(repo_path) as worker:
+        return worker.commit("HEAD")
+
+
+def head_tag(repo_path: str):
+    """
+    Find tag pointing to HEAD, choosing the same one as git describe --tags,
+    see misc.git_head_tag(). The cat-file process is only used for the tag
+    objects that cannot be read from files, because they are packed.
+
+    :return: name of tag pointing to HEAD or None if there is no such tag
+    """
+    gitdir, commondir = misc.git_find_dirs(repo_path)
+    sha, _ = misc.git_read_head(gitdir, commondir)
+    if not sha:
+        return None
+
+    def peel(refnames):
+        with pool.lease(repo_path) as worker:
+            objs = worker.read_many([f"{refname}^{{}}" for refname in refnames])
+        return [obj[0] if obj else None for obj in objs]
+
+    def tagger_times(refnames):
+        with pool.lease(repo_path) as worker:
+            objs = worker.read_many(refnames)
+        return [misc.git_parse_tagger_time(obj[2]) if obj else 0 for obj in objs]
+
+    return misc.git_head_tag(commondir, sha, peel=peel, tagger_times=tagger_times)
+
+
+def last_tag(repo_path: str):
+    """
+    Get name of the tag pointing to the newest (by committer date) tagged
+    commit. The result is cached until tags change.
+
+    This runs git rev-list and git describe rather than reading all tagged
+    commits through cat-file, which is slower in repos with many tags (and
+    rev-list decides between commits with the same date).
+
+    :return: tag name or "" if there are no tags
+    """
+    _, commondir = misc.git_find_dirs(repo_path)
+    key = os.path.realpath(repo_path)
+    mtimes = refs_mtimes(commondir)
+    cached = last_tags.get(key)
+    if cached and cached[0] == mtimes:
+        return cached[1]
+
+    sha = misc.cmd_run_get_output(f"git -C {repo_path} rev-list --tags --max-count=1")
+    name = misc.cmd_run_get_output(f"git -C {repo_path} describe --tags {sha}") if sha else ""
+    last_tags[key] = (mtimes, name)
+    return name
+
+
+def format_commit_time(commit, timeformat: str, now=None):
+    """
+    Format committer date of `commit` like the 'time' column of list_repos()
+
+    :param timeformat: rel, date, time
+    :param now:        Timestamp that relative time is computed from (default is now)
+    """
+    ts = commit['committer_time']
+    if timeformat in ("rel", "human"):
+        if now is None:
+            now = time.time()
+        return misc.secs_to_human_str(now - ts)
+    elif timeformat == "date":
+        # Like %cs of git log: date in the committer's timezone
+        tz = commit['committer_tz']
+        offset = (int(tz[1:3]) * 3600 + int(tz[3:5]) * 60) * (-1 if tz[0] == "-" else 1)
+        return time.strftime("%Y-%m-%d", time.gmtime(ts + offset))
+    elif timeformat in ("time", "datetime"):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+
+    return ""
@@ -1,9 +1,13 @@
 import os
 import sys
 import time
+import signal
 import fnmatch
+import threading
+import subprocess
 
 from multigit import misc
+from multigit import catfile
 from multigit.misc import Ansi, error
 
 
@@ -16,6 +20,24 @@ COL_SEPARATOR = "  "
 # Color code(s) to use for printing a symlinked repo
 PATH_SYMLINK_COLOR = "imagenta"
 
+# Repo speedups checked (and optionally applied) by optimize_repos(), in the
+# order they are applied: (name, git command that applies the speedup)
+OPTIMIZE_FIXES = [
+    ("repack", "repack -d"),
+    ("commit-graph", "commit-graph write --reachable"),
+    ("pack-refs", "pack-refs --all"),
+    ("untracked-cache", "config core.untrackedCache true"),
+    ("many-files", "config feature.manyFiles true"),
+]
+
+# Repos with more loose objects/refs than this are reported as needing repack/pack-refs
+OPTIMIZE_LOOSE_OBJECTS_MAX = 1000
+OPTIMIZE_LOOSE_REFS_MAX = 50
+
+# Only repos tracking more files than this are reported as needing
+# feature.manyFiles, as it switches to an index format some tools cannot read
+OPTIMIZE_MANY_FILES_MIN = 50000
+
 
 def list_repos(dirargs, exclude=None, depth=999,
                fields="", timeformat="",
@@ -36,15 +58,11 @@ def list_repos(dirargs, exclude=None, depth=999,
     elapsed_gitcmd = 0
 
     # Find out if we should cut off leading path components...
-    dir_names_pathcuts = []
-    for i, dirarg in enumerate(dirargs):
-        if ":" in dirarg:
-            dirname, path_cut = dirarg.split(":", maxsplit=1)
-            path_cut = int(path_cut)
-        else:
-            dirname, path_cut = dirarg, 0
-
-        dir_names_pathcuts.append((dirname, path_cut))
+    try:
+        dir_names_pathcuts = [split_dirarg(dirarg) for dirarg in dirargs]
+    except ValueError as e:
+        misc.error(str(e))
+        sys.exit(1)
 
     for i, (dirarg, pathcut) in enumerate(dir_names_pathcuts):
         if not os.path.isdir(dirarg):
@@ -78,73 +96,18 @@ def list_repos(dirargs, exclude=None, depth=999,
         for path in dirpaths:
             misc.progress_print(path)
 
-            desc, lasttag, branch, status, status_lines, url, reponame, _time, msg, is_submodule = \
-                "", "", "", "", "", "", "", "", "", ""
             try:
-                if "desc" in fields:
-                    desc = misc.cmd_run_get_output(f"git -C {path} describe --tags --always")
-                if "branch" in fields:
-                    branch = misc.cmd_run_get_output(f"git -C {path} branch --show-current")
-                if "status" in fields:
-                    status_lines, status = git_status_long_and_short(path)
-                if "url" in fields or "name" in fields:
-                    url = misc.cmd_run_get_output(f"git -C {path} config --get remote.origin.url")
-                    reponame = os.path.basename(url).replace(".git", "")
-                if "msg" in fields:
-                    # Get message of last git commit
-                    msg = misc.cmd_run_get_output(f"git -C {path} show -s --format=%s")
-                if "lasttag" in fields:
-                    # TODO: Don't show last tag if it points to the same commit as "git describe" returned
-                    last_tag_ref = misc.cmd_run_get_output(f"git -C {path} rev-list --tags --max-count=1")
-                    lasttag = misc.cmd_run_get_output(f"git -C {path} describe --tags {last_tag_ref}")
-                if "time" in fields:
-                    # %ct committer date, UNIX timestamp
-                    # %cd committer date (format respects --date= option)
-                    # %ci committer date, ISO 8601-like format: "2022-12-05 10:37:49 +0100"
-                    # %cs committer date, short format (YYYY-MM-DD)
-                    # --date=short
-                    # --date=format-local:'%Y-%m-%d %H:%M:%S'
-                    if timeformat in ("rel", "human"):
-                        _time = misc.cmd_run_get_output(f"git -C {path} show -s --format=%ct")
-                        _time = started - int(_time)
-                        _time = misc.secs_to_human_str(_time)
-                    elif timeformat == "date":
-                        _time = misc.cmd_run_get_output(f"git -C {path} show -s --format=%cs")
-                    elif timeformat in ("time", "datetime"):
-                        _time = misc.cmd_run_get_output(f"git -C {path} show -s --format=%cd --date=format-local:'%Y-%m-%d %H:%M:%S'")
-                if "sub" in fields:
-                    is_submodule = COL_SUBMODULE_TEXT if os.path.isfile(f"{path}/.git") else ""
+                info = get_repo_info(path, fields, timeformat, now=started)
             except Exception as e:
                 failed_paths.append(path)
                 print(e)
                 continue
 
             # Cut front directory parts of the full path to be printed/displayed
-            path_for_display = path
-            if pathcut:
-                parts = path.split("/")
-                # Remove first (empty) component if it is an absolute path
-                if not parts[0]:
-                    parts = parts[1:]
-                if pathcut > len(parts):
-                    pathcut = len(parts)
-                path_for_display = "/".join(parts[pathcut:])
-                if path_for_display == "":
-                    path_for_display = os.path.basename(path)
-
-            repos[path] = {
-                'path': path_for_display,
-                'desc': desc,
-                'lasttag': lasttag,
-                'branch': branch,
-                'status': status,
-                'status_lines': status_lines,
-                'url': url,
-                'name': reponame,
-                'time': _time,
-                'msg': msg,
-                'sub': is_submodule,
-            }
+            path_for_display = cut_path(path, pathcut)
+
+            info['path'] = path_for_display
+            repos[path] = info
             if os.path.islink(path):
                 repos[path]['path'] += "@"
 
@@ -229,6 +192,94 @@ def list_repos(dirargs, exclude=None, depth=999,
         misc.print_dim(f"elapsed: dirwalk={elapsed_oswalk:.1f}s git={elapsed_gitcmd:.1f}s", file=sys.stderr)
 
 
+def split_dirarg(dirarg):
+    """
+    Split directory argument "DIR:N" into DIR and N, the number of leading
+    path components to cut when printing repo paths (0 if there is no ':N')
+
+    :return: tuple (dirname, path_cut)
+    """
+    if ":" not in dirarg:
+        return dirarg, 0
+
+    dirname, path_cut = dirarg.split(":", maxsplit=1)
+    if not path_cut.isdigit():
+        raise ValueError(f"Invalid directory '{dirarg}': N of DIR:N must be a number")
+    return dirname, int(path_cut)
+
+
+def cut_path(path, path_cut):
+    """
+    Remove the `path_cut` first components of `path` for printing it
+    """
+    if not path_cut:
+        return path
+
+    parts = path.split("/")
+    # Remove first (empty) component if it is an absolute path
+    if not parts[0]:
+        parts = parts[1:]
+    path_for_display = "/".join(parts[path_cut:])
+    return path_for_display or os.path.basename(path)
+
+
+def get_repo_info(path, fields="", timeformat="", now=None):
+    """
+    Collect the info columns given by `fields` for the repo at `path`
+
+    :param path:       Path of git repo
+    :param fields:     Comma separated list of fields to collect
+    :param timeformat: Format of 'time' field: rel, date, time
+    :param now:        Timestamp that relative 'time' is computed from (default is now)
+    :return: dict with all fields (the ones not requested are empty)
+    """
+    if now is None:
+        now = time.time()
+
+    desc, lasttag, branch, status, status_lines, url, reponame, _time, msg, is_submodule = \
+        "", "", "", "", "", "", "", "", "", ""
+    if "desc" in fields:
+        # A tag pointing to HEAD is found via cat-file, otherwise we need
+        # git describe to count the commits since the last tag
+        desc = catfile.head_tag(path) or misc.cmd_run_get_output(f"git -C {path} describe --tags --always")
+    if "branch" in fields:
+        branch = misc.cmd_run_get_output(f"git -C {path} branch --show-current")
+    if "status" in fields:
+        status_lines, status = git_status_long_and_short(path)
+    if "url" in fields or "name" in fields:
+        url = misc.cmd_run_get_output(f"git -C {path} config --get remote.origin.url")
+        reponame = os.path.basename(url).replace(".git", "")
+    if "msg" in fields or "time" in fields:
+        # Committer date and message of last commit are read through the
+        # repo's long-lived cat-file process
+        commit = catfile.head_commit(path)
+        if commit is None:
+            raise RuntimeError(f"No commits in {path}")
+        if "msg" in fields:
+            msg = commit['subject']
+        if "time" in fields:
+            _time = catfile.format_commit_time(commit, timeformat, now=now)
+    if "lasttag" in fields:
+        # TODO: Don't show last tag if it points to the same commit as "git describe" returned
+        lasttag = catfile.last_tag(path)
+    if "sub" in fields:
+        is_submodule = COL_SUBMODULE_TEXT if os.path.isfile(f"{path}/.git") else ""
+
+    return {
+        'path': path,
+        'desc': desc,
+        'lasttag': lasttag,
+        'branch': branch,
+        'status': status,
+        'status_lines': status_lines,
+        'url': url,
+        'name': reponame,
+        'time': _time,
+        'msg': msg,
+        'sub': is_submodule,
+    }
+
+
 def find_repos(path=".", exclude=None, depth=999):
     gitdirs = []
 
@@ -286,23 +337,9 @@ def git_status_long_and_short(path):
     if not lines:
         return "", ""
 
-    status = {'M': 0, 'D': 0, 'R': 0, '?': 0}
-    unparsed = 0
-
-    # TODO: This is surely not the correct way to parse the output but it works in many cases
-    for line in lines:
-        xy = line[0:2]
-        if xy[0] in status.keys():
-            status[xy[0]] += 1
-        elif xy[1] in status.keys():
-            status[xy[1]] += 1
-        else:
-            unparsed += 1
-
-    status['X'] = unparsed
-    s_list = [f"{k}{v}" for k, v in status.items() if v > 0]
+    status = misc.git_status_summary(lines)
     lines = [line for line in lines if not line.startswith("??")]
-    return lines, " ".join(s_list)
+    return lines, status
 
 
 def pull_repos(dirargs, exclude=None, depth=999):
@@ -338,6 +375,234 @@ def pull_repos(dirargs, exclude=None, depth=999):
         misc.print_dim(f"elapsed: dirwalk={elapsed_oswalk:.1f}s git={elapsed_gitcmd:.1f}s", file=sys.stderr)
 
 
+def parse_filters(where):
+    """
+    Parse repo filters `where`. A filter is either FIELD=GLOB (e.g.
+    "branch=feat*") matched against a field of get_repo_info(), or one of
+    "dirty" and "clean" (based on 'status' field).
+
+    :return: list of tuples (field, glob pattern)
+    """
+    filters = []
+    for item in where:
+        if item == "dirty":
+            filters.append(("status", "?*"))
+        elif item == "clean":
+            filters.append(("status", ""))
+        elif "=" in item:
+            field, pattern = item.split("=", maxsplit=1)
+            if field not in misc.ALL_FIELDS.split(","):
+                raise ValueError(f"Invalid filter '{item}': unknown field '{field}'")
+            filters.append((field, pattern))
+        else:
+            raise ValueError(f"Invalid filter '{item}': must be dirty, clean or FIELD=GLOB")
+
+    return filters
+
+
+def repo_matches(path, filters):
+    """
+    :param filters: Filters as returned by parse_filters()
+    :return: True if repo at `path` matches all `filters`
+    """
+    fields = ",".join(field for field, _ in filters)
+    info = get_repo_info(path, fields, timeformat="rel")
+    return all(fnmatch.fnmatch(info[field], pattern) for field, pattern in filters)
+
+
+class ExecProcesses:
+    """
+    Processes started by exec_repo() in different threads, so that all of
+    them can be killed when the user hits Ctrl-C
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.processes = set()
+        self.killed = False
+
+    def add(self, process):
+        with self.lock:
+            self.processes.add(process)
+            killed = self.killed
+        # Kill processes started after kill() right away
+        if killed:
+            self.kill_process(process)
+
+    def remove(self, process):
+        with self.lock:
+            self.processes.discard(process)
+
+    def kill(self):
+        with self.lock:
+            self.killed = True
+            processes = list(self.processes)
+        for process in processes:
+            self.kill_process(process)
+
+    @staticmethod
+    def kill_process(process, sig=signal.SIGTERM):
+        # Kill the process group, i.e. also any processes the command spawned
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            pass
+
+
+def exec_repo(path, cmd, timeout=None, processes=None):
+    """
+    Run `cmd` (an argv list, not a shell command) in repo at `path`
+
+    :param timeout:   Kill the command if it runs for longer than this many seconds
+    :param processes: ExecProcesses to register the command process in while it runs
+    :return: tuple (returncode, output) where output is stdout and stderr
+             combined, and returncode is None if command timed out
+    """
+    try:
+        # Start command in its own process group so that we can kill any
+        # processes it has spawned as well if it times out
+        process = subprocess.Popen(
+            cmd, cwd=path, start_new_session=True,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    except OSError as e:
+        return 127, str(e)
+
+    if processes:
+        processes.add(process)
+    try:
+        output, _ = process.communicate(timeout=timeout)
+        returncode = process.returncode
+    except subprocess.TimeoutExpired:
+        ExecProcesses.kill_process(process, signal.SIGKILL)
+        output, _ = process.communicate()
+        returncode = None
+    finally:
+        if processes:
+            processes.remove(process)
+
+    return returncode, output.decode("utf8", errors="replace")
+
+
+def exec_repos(dirargs, cmd, exclude=None, depth=999,
+               jobs=None, timeout=None, where=None):
+    """
+    Run `cmd` in all repos below `dirargs`, in parallel, printing the output
+    of each repo as a group when its command is done. Repos are matched
+    against the `where` filters in the same threads, just before running
+    `cmd` in them.
+
+    On Ctrl-C, commands not yet started are cancelled and running ones are
+    killed (with SIGTERM).
+
+    :param cmd:     Command to run as an argv list
+    :param jobs:    Max number of repos to process in parallel (default is number of CPUs)
+    :param timeout: Max number of seconds each command may run
+    :param where:   List of filters selecting the repos to run in, see parse_filters()
+    :return: 0 if command succeeded in all repos, 130 if interrupted, otherwise 1
+    """
+    # Imported here as it is slow to import and only needed by a few commands
+    import concurrent.futures
+
+    elapsed_oswalk = 0
+    elapsed_gitcmd = 0
+
+    try:
+        dir_names_pathcuts = [split_dirarg(dirarg) for dirarg in dirargs]
+        filters = parse_filters(where or [])
+    except ValueError as e:
+        misc.error(str(e))
+        return 1
+
+    status = 0
+    repos = []
+    for dirarg, pathcut in dir_names_pathcuts:
+        if not os.path.isdir(dirarg):
+            misc.error(f"Not a directory: {dirarg}")
+            status = 1
+            continue
+
+        started = time.time()
+        paths = find_repos(dirarg, exclude, depth=depth)
+        elapsed_oswalk += time.time() - started
+        if not paths:
+            misc.error(f"No git repos found below {dirarg}")
+            status = 1
+        repos += [(path, cut_path(path, pathcut)) for path in paths]
+
+    if not repos:
+        return 1
+
+    processes = ExecProcesses()
+
+    def run(path):
+        """
+        :return: result of exec_repo() or None if repo does not match filters
+        """
+        if filters:
+            try:
+                if not repo_matches(path, filters):
+                    return None
+            except RuntimeError as e:
+                misc.error(f"Skipping {path}: {str(e).rstrip()}")
+                return None
+        # Do not start the command if interrupted while matching filters
+        if processes.killed:
+            return None
+        return exec_repo(path, cmd, timeout, processes)
+
+    started = time.time()
+    num_run = 0
+    failed = []
+    timed_out = []
+    interrupted = None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        futures = {executor.submit(run, path): (path, display) for path, display in repos}
+        pending = set(futures)
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                pending.discard(future)
+                path, display = futures[future]
+                result = future.result()
+                if result is None:
+                    continue
+
+                num_run += 1
+                returncode, output = result
+                if returncode is None:
+                    timed_out.append(display)
+                    misc.print_lite(f"{display} {Ansi.ired}(timed out after {timeout}s)")
+                elif returncode != 0:
+                    failed.append(display)
+                    misc.print_lite(f"{display} {Ansi.ired}(exit status {returncode})")
+                else:
+                    misc.print_lite(display)
+                if output:
+                    print(output.rstrip("\n"))
+        except KeyboardInterrupt:
+            # Futures are cancelled one by one, as shutdown(cancel_futures=True)
+            # requires python 3.9. Running ones finish when their process is killed
+            for future in pending:
+                future.cancel()
+            processes.kill()
+            interrupted = len(pending)
+
+    elapsed_gitcmd += time.time() - started
+
+    num_ok = num_run - len(failed) - len(timed_out)
+    summary = f"Ran in {num_run} repos: {num_ok} ok, {len(failed)} failed, {len(timed_out)} timed out"
+    if interrupted is not None:
+        summary = f"Interrupted. {summary}, {interrupted} not run or killed"
+    misc.print_dim(summary)
+    for path in sorted(failed + timed_out):
+        misc.print_dim(f"  {path}")
+
+    if misc.verbose > 0:
+        misc.print_dim(f"elapsed: dirwalk={elapsed_oswalk:.1f}s cmd={elapsed_gitcmd:.1f}s", file=sys.stderr)
+
+    if interrupted is not None:
+        return 130
+    return 1 if status or failed or timed_out else 0
+
+
 def list_branches(sortby: str = "date"):
     """
     List all branches in current repo with date, branch name and author
@@ -408,3 +673,202 @@ def list_branches(sortby: str = "date"):
             f"{author_color}{line['author']:{w['author']}}",
         ]
         print("  ".join(columns))
+
+
+def git_common_dir(path):
+    """
+    Return the git directory holding objects and refs of the repo at `path`.
+    This is not `path`/.git for submodules and worktrees where .git is a file.
+    """
+    gitdir = misc.cmd_run_get_output(f"git -C {path} rev-parse --git-common-dir")
+    return os.path.join(path, gitdir)
+
+
+def git_index_entries(path):
+    """
+    Return number of entries in the index (i.e. tracked files) of the repo at
+    `path`, read from the index file header
+    """
+    gitdir, _ = misc.git_find_dirs(path)
+    try:
+        with open(f"{gitdir}/index", "rb") as f:
+            header = f.read(12)
+    except FileNotFoundError:
+        return 0
+
+    # Header is "DIRC", 4-byte version and 4-byte number of entries
+    if len(header) < 12 or header[:4] != b"DIRC":
+        return 0
+    return int.from_bytes(header[8:12], "big")
+
+
+def optimize_check(path):
+    """
+    Check which of the OPTIMIZE_FIXES speedups the repo at `path` is missing
+
+    :param path: Path of git repo
+    :return: list of names of missing speedups
+    """
+    gitdir = git_common_dir(path)
+    missing = []
+
+    lines = misc.cmd_run_get_output(f"git -C {path} count-objects -v", splitlines=True)
+    counts = dict(line.split(": ", maxsplit=1) for line in lines)
+    if int(counts.get("count", 0)) > OPTIMIZE_LOOSE_OBJECTS_MAX:
+        missing.append("repack")
+
+    loose_refs = sum(len(files) for _, _, files in os.walk(f"{gitdir}/refs"))
+
+    # A repo without any refs (no commits) has nothing to write a commit-graph for
+    has_refs = loose_refs > 0 or os.path.isfile(f"{gitdir}/packed-refs")
+    info_dir = f"{gitdir}/objects/info"
+    if has_refs and not (os.path.isfile(f"{info_dir}/commit-graph") or os.path.isdir(f"{info_dir}/commit-graphs")):
+        missing.append("commit-graph")
+
+    if loose_refs > OPTIMIZE_LOOSE_REFS_MAX:
+        missing.append("pack-refs")
+
+    # feature.manyFiles implies core.untrackedCache=true unless that is set explicitly
+    many_files = misc.cmd_run_get_output(f"git -C {path} config --get feature.manyFiles", on_error="")
+    untracked_cache = misc.cmd_run_get_output(f"git -C {path} config --get core.untrackedCache", on_error="")
+    if untracked_cache != "true" and not (untracked_cache == "" and many_files == "true"):
+        missing.append("untracked-cache")
+    if many_files != "true" and git_index_entries(path) > OPTIMIZE_MANY_FILES_MIN:
+        missing.append("many-files")
+
+    return missing
+
+
+def optimize_apply(path, missing):
+    """
+    Apply the `missing` speedups (names in OPTIMIZE_FIXES) to the repo at `path`
+
+    :return: list of names of speedups that failed
+    """
+    failed = []
+    for name, gitcmd in OPTIMIZE_FIXES:
+        if name not in missing:
+            continue
+        try:
+            misc.cmd_run_get_output(f"git -C {path} {gitcmd}")
+        except RuntimeError as e:
+            misc.error(str(e).rstrip())
+            failed.append(name)
+
+    return failed
+
+
+def optimize_time_repo(path, fields="", timeformat=""):
+    """
+    Time how long it takes to collect `fields` of the repo at `path`
+
+    :return: seconds or None if collecting the fields failed
+    """
+    try:
+        # First call is to warm up the OS file cache and the untracked cache.
+        # The cat-file process it started is closed, so that the timed call
+        # includes starting one like a normal listing does
+        get_repo_info(path, fields, timeformat)
+        catfile.pool.evict(path)
+        started = time.time()
+        get_repo_info(path, fields, timeformat)
+        return time.time() - started
+    except RuntimeError:
+        return None
+    finally:
+        # Also not to leave it running while the repo is optimized
+        catfile.pool.evict(path)
+
+
+def optimize_repos(dirargs, exclude=None, depth=999,
+                   fields="", timeformat="", apply=False, jobs=None):
+    """
+    Report which speedups (see OPTIMIZE_FIXES) the repos below `dirargs` are
+    missing and optionally apply them. Repos are processed in parallel.
+
+    :param fields:     Fields to collect when timing each repo before/after
+    :param apply:      True to apply the missing speedups (default is a dry-run)
+    :param jobs:       Max number of repos to process in parallel (default is number of CPUs)
+    """
+    # Imported here as it is slow to import and only needed by a few commands
+    import concurrent.futures
+
+    elapsed_oswalk = 0
+    elapsed_gitcmd = 0
+
+    try:
+        dir_names_pathcuts = [split_dirarg(dirarg) for dirarg in dirargs]
+    except ValueError as e:
+        misc.error(str(e))
+        sys.exit(1)
+
+    for dirarg, pathcut in dir_names_pathcuts:
+        if not os.path.isdir(dirarg):
+            misc.error(f"Not a directory: {dirarg}")
+            continue
+
+        started = time.time()
+        dirpaths = find_repos(dirarg, exclude, depth=depth)
+        elapsed_oswalk += time.time() - started
+        if not dirpaths:
+            misc.error(f"No git repos found below {dirarg}")
+            continue
+
+        def run_parallel(func, paths):
+            results = {}
+            with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+                futures = {executor.submit(func, path): path for path in paths}
+                for future in concurrent.futures.as_completed(futures):
+                    path = futures[future]
+                    misc.progress_print(path)
+                    try:
+                        results[path] = future.result()
+                    except Exception as e:
+                        misc.error(f"{path}: {str(e).rstrip()}")
+            misc.progress_end()
+            return results
+
+        # Repos are checked and optimized in parallel, but timed one at a time
+        # so that the timings are not skewed by other repos being optimized
+        started = time.time()
+        missing = run_parallel(optimize_check, dirpaths)
+        before = {path: optimize_time_repo(path, fields, timeformat) for path in missing}
+        if apply:
+            failed = run_parallel(lambda path: optimize_apply(path, missing[path]), [p for p in missing if missing[p]])
+            after = {path: optimize_time_repo(path, fields, timeformat) for path in missing}
+        elapsed_gitcmd += time.time() - started
+
+        def format_time(secs):
+            return f"{secs * 1000:.0f}ms" if secs is not None else "n/a"
+
+        rows = []
+        for path in dirpaths:
+            if path not in missing:
+                continue
+            names = [f"{name}(failed)" if apply and name in failed.get(path, []) else name for name in missing[path]]
+            row = {'path': cut_path(path, pathcut), 'missing': " ".join(names), 'before': format_time(before[path])}
+            if apply:
+                row['after'] = format_time(after[path])
+            rows.append(row)
+
+        # Compute max width of all columns across all lines
+        head = ["path", "missing", "before"] + (["after"] if apply else [])
+        w = {}
+        for k in head:
+            w[k] = max([len(row[k]) for row in rows] + [len(k)])
+
+        header = COL_SEPARATOR.join([f"{col:{w[col]}}" for col in head])
+        print(header)
+        print("-" * len(header))
+        for row in rows:
+            columns = [f"{row[col]:{w[col]}}" for col in head]
+            print(COL_SEPARATOR.join(columns).rstrip())
+
+        num_missing = len([row for row in rows if row['missing']])
+        if apply:
+            misc.print_dim(f"Optimized {num_missing} of {len(rows)} repos")
+        else:
+            misc.print_dim(f"{num_missing} of {len(rows)} repos are missing speedups (use --apply to apply them)")
+
+    if misc.verbose > 0:
+        misc.print_dim(f"elapsed: dirwalk={elapsed_oswalk:.1f}s git={elapsed_gitcmd:.1f}s", file=sys.stderr)
@@ -2,14 +2,14 @@
 # Extract git summary info across multiple git repos below some folder (recursively)
 # tags: git
 
-import argparse
+import sys
 
-from . import gitops
+# Only lightweight modules are imported here; argparse, gitops etc. are
+# imported when needed, to keep the --prompt fast path fast
 from . import misc
-from .misc import Ansi
+from .misc import Ansi, ALL_FIELDS
 
 
-ALL_FIELDS = "path,url,name,sub,desc,lasttag,branch,time,status,msg"
 DEFAULT_FIELDS = "path,sub,desc,branch,time,status,msg"
 BRANCH_COLORS = {
     "main": "",
@@ -17,13 +17,37 @@ BRANCH_COLORS = {
     "*": "green",
 }
 
-opt = argparse.Namespace()
+opt = None
 
 def main():
     global opt
-    opt = parser_create().parse_args()
+
+    # Fast path for calling misgit from the shell prompt, i.e. "--prompt [DIR]".
+    # Any other options are left for argparse
+    argv = sys.argv[1:]
+    if argv[:1] == ["--prompt"] and (len(argv) == 1 or len(argv) == 2 and not argv[1].startswith("-")):
+        from . import prompt
+        sys.exit(prompt.main(*argv[1:]))
+
+    # "exec [OPTIONS] [DIR...] -- CMD..." is split here, as argparse would
+    # mix up the DIR and CMD arguments
+    exec_cmd = None
+    if argv and argv[0] == "exec":
+        if "--" not in argv or argv.index("--") == len(argv) - 1:
+            misc.error("exec requires a command: misgit exec [OPTIONS] [DIR...] -- CMD...")
+            sys.exit(2)
+        i = argv.index("--")
+        argv, exec_cmd = argv[1:i], argv[i + 1:]
+
+    opt = parser_create().parse_args(argv)
     misc.verbose = opt.verbose
 
+    if opt.prompt:
+        from . import prompt
+        sys.exit(prompt.main(*opt.posargs[:1]))
+
+    from . import gitops
+
     # We don't want any ANSI codes when writing output to a file
     if opt.diff:
         Ansi.set_no_colors()
@@ -52,8 +76,16 @@ def main():
 
     misc.progress_start()
 
-    if opt.pull:
+    if exec_cmd:
+        status = gitops.exec_repos(dirargs, exec_cmd, excludes, depth=opt.maxdepth,
+                                   jobs=opt.jobs, timeout=opt.timeout, where=opt.where)
+        sys.exit(status)
+    elif opt.pull:
         gitops.pull_repos(dirargs, excludes, depth=opt.maxdepth)
+    elif opt.optimize:
+        gitops.optimize_repos(dirargs, excludes, depth=opt.maxdepth,
+                              fields=fields, timeformat=opt.timeformat,
+                              apply=opt.apply, jobs=opt.jobs)
     else:
         gitops.list_repos(dirargs, excludes, depth=opt.maxdepth,
                           fields=fields, timeformat=opt.timeformat,
@@ -61,7 +93,10 @@ def main():
                           branch_colors=branch_colors)
 
 
-examples = f"""Examples:
+def parser_create():
+    import argparse
+
+    examples = f"""Examples:
   Compare two directories of git repos:
     %(prog)s --diff ./foo:1 /home/joe/work/foo:4
   List repos excluding some folder (matching any folder in the hierarchy):
@@ -72,17 +107,29 @@ examples = f"""Examples:
     %(prog)s -c'feat*=pink,bugfix*=ired'
   List branches (refs) of current repo:
     %(prog)s -b
+  Show summary of current repo in the bash prompt:
+    PS1='$(%(prog)s --prompt) \\$ '
+  Show which speedups (commit-graph etc.) repos are missing and then apply them:
+    %(prog)s --optimize
+    %(prog)s --optimize --apply
+  Run command in all repos, 8 at a time, with a timeout of 60 seconds per repo:
+    %(prog)s exec -j8 --timeout 60 -- git fetch --prune
+  Run command in dirty repos on a feature branch below some folder:
+    %(prog)s exec -w dirty -w 'branch=feat*' ~/work -- git stash list
 
 Colors (for -c option):
     {Ansi.get_colors()}
 """
 
-def parser_create():
     description = f"""
 Show git summary info for all git repos below some folder (recursively) 
 
 For each repo found, shows: {DEFAULT_FIELDS}
 All available fields are:   {ALL_FIELDS}
+
+Run a command (without a shell) in all repos in parallel, printing the output
+of each repo when it is done (see -j, --timeout and -w options):
+    %(prog)s exec [OPTIONS] [DIR...] -- CMD...
 """
     parser = argparse.ArgumentParser(
         description=description, epilog=examples, add_help=False, formatter_class=argparse.RawTextHelpFormatter)
@@ -120,8 +167,23 @@ The '*' name/pattern acts as default color""")
         help="Compare two trees (requires two DIRectory arguments)")
     g.add_argument('--pull', dest='pull', action='store_true', default=False,
         help="Pull all repos (with --rebase)")
+    g.add_argument('--optimize', dest='optimize', action='store_true', default=False,
+        help="""Report speedups (commit-graph, packed refs, untracked cache etc.)
+each repo is missing, and time listing FIELDS of each repo""")
+    g.add_argument('--apply', dest='apply', action='store_true', default=False,
+        help="Apply missing speedups (for --optimize) and time listing again")
+    g.add_argument('-j', dest='jobs', metavar='NUM', type=positive_int, default=None,
+        help="Max number of repos to process in parallel (for --optimize and exec).\nDefault is number of CPUs")
+    g.add_argument('--timeout', dest='timeout', metavar='SECS', type=float, default=None,
+        help="Kill command if it runs longer than SECS in a repo (for exec)")
+    g.add_argument('-w', dest='where', metavar='FILTER', type=str, action="append",
+        help="""Only run in repos matching FILTER (for exec): 'dirty', 'clean' or
+FIELD=GLOB, e.g. 'branch=feat*'. Can be given multiple times.""")
 
     g = parser.add_argument_group("Other commands/options")
+    g.add_argument('--prompt', dest='prompt', action='store_true', default=False,
+        help="""Print desc, branch and status of repo containing DIR (default is
+current dir) on one line. This is fast enough for the shell prompt""")
     g.add_argument('-b', dest='list_branches', action='store_true', default=False,
         help="List branches of current repo with last commit date and author")
     g.add_argument('-s', dest='sortby', type=str, default="date",
@@ -136,6 +198,17 @@ The '*' name/pattern acts as default color""")
     return parser
 
 
+def positive_int(s):
+    import argparse
+    try:
+        value = int(s)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{s}'")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: '{s}'")
+    return value
+
+
 def get_branch_colors():
     branch_colors = BRANCH_COLORS.copy()
     if opt.branch_color:
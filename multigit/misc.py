@@ -1,8 +1,11 @@
 import os
 import sys
-import subprocess
+import zlib
 
 
+# Fields (columns) of a repo, see gitops.get_repo_info()
+ALL_FIELDS = "path,url,name,sub,desc,lasttag,branch,time,status,msg"
+
 term_cols = 0
 verbose = False
 
@@ -92,6 +95,247 @@ def git_get_sha_branch_describe(repo_path: str, what="hbd"):
     return root, sha, branch, desc
 
 
+def git_find_dirs(repo_path: str):
+    """
+    Find the git directories of the repo at `repo_path` without running git.
+    The `gitdir` holds HEAD and the index while `commondir` holds objects and
+    refs. They differ for worktrees, and both differ from `repo_path`/.git
+    for submodules.
+
+    :param repo_path: Top-level directory of a repo
+    :return: tuple (gitdir, commondir)
+    """
+    gitdir = os.path.join(repo_path, ".git")
+    if os.path.isfile(gitdir):
+        with open(gitdir) as f:
+            line = f.readline().strip()
+        if not line.startswith("gitdir: "):
+            raise RuntimeError(f"Invalid .git file in {repo_path}")
+        gitdir = os.path.join(repo_path, line[len("gitdir: "):])
+
+    commondir = gitdir
+    try:
+        with open(f"{gitdir}/commondir") as f:
+            commondir = os.path.join(gitdir, f.read().strip())
+    except FileNotFoundError:
+        pass
+
+    return gitdir, commondir
+
+
+def git_read_refs(commondir: str, prefix="refs/", peeled=False):
+    """
+    Read the refs starting with `prefix` from the packed-refs file and the
+    loose ref files of a repo. Symbolic refs are skipped.
+
+    :param commondir: Git directory holding the refs, see git_find_dirs()
+    :param prefix:    Prefix of refs to read, e.g. "refs/tags/"
+    :param peeled:    True to also get the SHA of the (non-tag) object each
+                      ref points to, i.e. annotated tags are peeled
+    :return: dict of refname -> SHA, or if `peeled` is True, dict of
+             refname -> (SHA, peeled SHA) where peeled SHA is None if it
+             cannot be found from the files (tag object is packed)
+    """
+    if os.path.isdir(f"{commondir}/reftable"):
+        raise RuntimeError(f"Reading reftable refs is not supported: {commondir}")
+
+    refs = {}
+    try:
+        with open(f"{commondir}/packed-refs") as f:
+            traits = []
+            refname = None
+            for line in f:
+                if line.startswith("# pack-refs with:"):
+                    traits = line.split(":", maxsplit=1)[1].split()
+                    continue
+                if line.startswith("#"):
+                    continue
+                # Peeled line "^SHA" follows the line of an annotated tag
+                if line.startswith("^"):
+                    if peeled and refname in refs:
+                        refs[refname] = (refs[refname][0], line[1:].strip())
+                    continue
+                sha, refname = line.rstrip("\n").split(" ", maxsplit=1)
+                if refname.startswith(prefix):
+                    if peeled:
+                        # A ref without peeled line is known not to be an annotated
+                        # tag if packed-refs has the 'fully-peeled' trait (or the
+                        # 'peeled' trait, which is about refs/tags/ only)
+                        known = "fully-peeled" in traits or "peeled" in traits and refname.startswith("refs/tags/")
+                        refs[refname] = (sha, sha if known else None)
+                    else:
+                        refs[refname] = sha
+    except FileNotFoundError:
+        pass
+
+    # Loose refs take precedence over packed ones
+    for root, dirs, files in os.walk(os.path.join(commondir, prefix.rstrip("/"))):
+        for name in files:
+            filepath = os.path.join(root, name)
+            refname = os.path.relpath(filepath, commondir).replace(os.sep, "/")
+            if not refname.startswith(prefix):
+                continue
+            with open(filepath) as f:
+                sha = f.readline().strip()
+            if sha and not sha.startswith("ref:"):
+                refs[refname] = (sha, git_peel_loose_object(commondir, sha)) if peeled else sha
+
+    return refs
+
+
+def git_read_loose_object(commondir: str, sha: str, max_size=0):
+    """
+    Read the loose object `sha` of a repo
+
+    :param max_size: Max number of bytes to decompress (0 for all)
+    :return: tuple (type, data) or None if object is not loose (it is packed)
+    """
+    try:
+        with open(f"{commondir}/objects/{sha[:2]}/{sha[2:]}", "rb") as f:
+            raw = zlib.decompressobj().decompress(f.read(), max_size)
+    except (FileNotFoundError, zlib.error):
+        return None
+
+    # Object is "<type> <size>\0<data>"
+    header, _, data = raw.partition(b"\0")
+    return header.split(b" ")[0].decode(), data
+
+
+def git_peel_loose_object(commondir: str, sha: str):
+    """
+    Peel the loose object `sha`, i.e. if it is an annotated tag, follow it to
+    the object it points to.
+
+    :return: SHA of the peeled object or None if any of the objects read is
+             not loose (it is packed, e.g. after git fetch)
+    """
+    while True:
+        # Header and first line of a tag object is well within 100 bytes
+        obj = git_read_loose_object(commondir, sha, max_size=100)
+        if obj is None:
+            return None
+
+        # Tag object data is "object <sha>\ntype commit\n..."
+        objtype, data = obj
+        if objtype != "tag":
+            return sha
+        line = data.split(b"\n", maxsplit=1)[0]
+        if not line.startswith(b"object "):
+            return None
+        sha = line[len(b"object "):].decode()
+
+
+def git_parse_tagger_time(data: bytes):
+    """
+    :return: tagger timestamp of tag object `data` or 0 if it has no tagger
+    """
+    for line in data.split(b"\n"):
+        # Empty line ends the headers
+        if not line:
+            break
+        if line.startswith(b"tagger "):
+            # "tagger Joe <joe@example.com> 1670233069 +0100"
+            return int(line.rsplit(b" ", maxsplit=2)[1])
+    return 0
+
+
+def git_head_tag(commondir: str, sha: str, peel=None, tagger_times=None):
+    """
+    Find the tag that git describe --tags shows for commit `sha` (HEAD) if it
+    is tagged: annotated tags before lightweight ones, then the annotated tag
+    with newest tagger date, then the first tag by name.
+
+    Tags are peeled and tagger dates read from the repo files. For the tag
+    objects that are packed, the given functions are used:
+
+    :param peel:         function mapping a list of refnames to a list of the
+                         SHAs they peel to (None where that fails)
+    :param tagger_times: function mapping a list of refnames of annotated
+                         tags to a list of tagger timestamps
+    :return: tag name or None if no tag points to `sha`
+    """
+    refs = git_read_refs(commondir, prefix="refs/tags/", peeled=True)
+
+    unknown = [refname for refname, (_, peeled) in refs.items() if peeled is None]
+    if unknown and peel:
+        for refname, peeled in zip(unknown, peel(unknown)):
+            refs[refname] = (refs[refname][0], peeled)
+
+    tags = sorted(refname for refname, (_, peeled) in refs.items() if peeled == sha)
+    annotated = [refname for refname in tags if refs[refname][0] != sha]
+    if len(annotated) == 1:
+        tags = annotated
+    elif annotated:
+        times = {}
+        for refname in annotated:
+            obj = git_read_loose_object(commondir, refs[refname][0])
+            times[refname] = git_parse_tagger_time(obj[1]) if obj else None
+
+        unknown = [refname for refname in annotated if times[refname] is None]
+        if unknown and tagger_times:
+            times.update(zip(unknown, tagger_times(unknown)))
+
+        # max() returns the first of equal items, i.e. the first by name
+        tags = [max(annotated, key=lambda refname: times[refname] or 0)]
+
+    return tags[0][len("refs/tags/"):] if tags else None
+
+
+def git_read_head(gitdir: str, commondir: str):
+    """
+    Read HEAD of a repo from its files without running git
+
+    :return: tuple (sha, branch) where branch is "" if HEAD is detached
+             and sha is "" if branch has no commits yet
+    """
+    with open(f"{gitdir}/HEAD") as f:
+        head = f.readline().strip()
+
+    if not head.startswith("ref: "):
+        return head, ""
+
+    refname = head[len("ref: "):]
+    branch = refname[len("refs/heads/"):] if refname.startswith("refs/heads/") else refname
+    try:
+        with open(f"{commondir}/{refname}") as f:
+            return f.readline().strip(), branch
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+
+    try:
+        with open(f"{commondir}/packed-refs") as f:
+            for line in f:
+                if line.rstrip("\n").endswith(f" {refname}"):
+                    return line.split(" ", maxsplit=1)[0], branch
+    except FileNotFoundError:
+        pass
+
+    return "", branch
+
+
+def git_status_summary(lines):
+    """
+    Summarize lines of 'git status --porcelain' into a short string like
+    "M1 ?6" that tells the number of modified (M), deleted (D), renamed (R),
+    untracked (?) and other (X) files
+    """
+    status = {'M': 0, 'D': 0, 'R': 0, '?': 0}
+    unparsed = 0
+
+    # TODO: This is surely not the correct way to parse the output but it works in many cases
+    for line in lines:
+        xy = line[0:2]
+        if xy[0] in status.keys():
+            status[xy[0]] += 1
+        elif xy[1] in status.keys():
+            status[xy[1]] += 1
+        else:
+            unparsed += 1
+
+    status['X'] = unparsed
+    return " ".join([f"{k}{v}" for k, v in status.items() if v > 0])
+
+
 def cmd_run_get_output(cmd: str, cwd=None, splitlines=False, on_error="raise"):
     """
     Run `cmd` in directory `cwd` and return output stripped for newline
@@ -105,6 +349,9 @@ def cmd_run_get_output(cmd: str, cwd=None, splitlines=False, on_error="raise"):
     :param on_error: Value (or exception to raise) on error, i.e. if command fails
     :return:
     """
+    # Imported here as it is slow to import and not needed by the --prompt fast path
+    import subprocess
+
     # Using universal_newlines=True converts the output to a string instead of a byte array
     # From Python 3.7 we can use the more intuitive text=True instead of universal_newlines
     process = subprocess.run(
@@ -0,0 +1,119 @@
+import os
+
+from multigit import misc
+
+
+# Number of SHA characters to show when HEAD is not tagged
+SHA_SHORT_LEN = 7
+
+
+def find_repo_root(path="."):
+    """
+    Find top-level directory of the repo containing `path` without running git
+
+    :return: path of repo or None if `path` is not inside a repo
+    """
+    path = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(path, ".git")):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def run_get_lines(argv):
+    """
+    Run command `argv` and return its output lines or None if it fails.
+    The subprocess module is only used if os.posix_spawnp() is not available
+    (python < 3.8), since importing it takes longer than running git status.
+    """
+    if not hasattr(os, "posix_spawnp"):
+        import subprocess
+        process = subprocess.run(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        return process.stdout.decode("utf8", errors="replace").splitlines() if process.returncode == 0 else None
+
+    fd_read, fd_write = os.pipe()
+    fd_null = os.open(os.devnull, os.O_RDWR)
+    try:
+        pid = os.posix_spawnp(argv[0], argv, os.environ, file_actions=[
+            (os.POSIX_SPAWN_DUP2, fd_null, 0),
+            (os.POSIX_SPAWN_DUP2, fd_write, 1),
+            (os.POSIX_SPAWN_DUP2, fd_null, 2),
+        ])
+    finally:
+        os.close(fd_write)
+        os.close(fd_null)
+
+    chunks = []
+    with os.fdopen(fd_read, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            chunks.append(chunk)
+
+    _, status = os.waitpid(pid, 0)
+    if not os.WIFEXITED(status) or os.WEXITSTATUS(status) != 0:
+        return None
+
+    return b"".join(chunks).decode("utf8", errors="replace").splitlines()
+
+
+def get_prompt(path="."):
+    """
+    Get a compact summary line of the repo containing `path`, like
+    "v0.1.0 main M1 ?6" (desc, branch, status). The desc is the tag pointing
+    to HEAD or the short SHA of HEAD otherwise.
+
+    HEAD and tags are read from the repo files, so only 'git status' is run
+    (plus 'git rev-parse' or 'git for-each-ref' if there are annotated tags
+    whose objects are packed). This is meant to be fast enough to be run for
+    each shell prompt.
+
+    :return: summary line or None if `path` is not inside a repo
+    """
+    root = find_repo_root(path)
+    if root is None:
+        return None
+
+    gitdir, commondir = misc.git_find_dirs(root)
+    sha, branch = misc.git_read_head(gitdir, commondir)
+
+    desc = sha[:SHA_SHORT_LEN]
+    if sha:
+        # Tag objects that are packed (e.g. fetched ones) cannot be read from
+        # the files, so let git read those. This is needed until next git gc
+        def peel(refnames):
+            lines = run_get_lines(["git", "-C", root, "rev-parse"] + [f"{refname}^{{}}" for refname in refnames])
+            return lines if lines is not None and len(lines) == len(refnames) else [None] * len(refnames)
+
+        def tagger_times(refnames):
+            lines = run_get_lines(["git", "-C", root, "for-each-ref", "--format=%(refname) %(taggerdate:unix)"] + refnames)
+            times = dict(line.split(" ", maxsplit=1) for line in lines or [])
+            return [int(times.get(refname) or 0) for refname in refnames]
+
+        desc = misc.git_head_tag(commondir, sha, peel=peel, tagger_times=tagger_times) or desc
+
+    # Optional locks are not taken, to not interfere with git commands
+    # the user runs at the same time
+    lines = run_get_lines(["git", "--no-optional-locks", "-C", root, "status", "--porcelain"])
+    status = misc.git_status_summary(lines) if lines is not None else ""
+
+    return " ".join(s for s in (desc, branch, status) if s)
+
+
+def main(path="."):
+    """
+    Print summary line of repo containing `path`
+
+    :return: exit status: 0 on success or 1 if not inside a repo
+    """
+    try:
+        line = get_prompt(path)
+    except (OSError, RuntimeError):
+        line = None
+
+    if line is None:
+        return 1
+
+    print(line)
+    return 0